@@ -1,10 +1,24 @@
 import ctypes
+import gc
 import os
 import re
 import sys
+import csv
+import calendar
 import json
-from PIL import Image
-from datetime import datetime
+import argparse
+import hashlib
+import shutil
+import tempfile
+import time
+import queue
+import asyncio
+import bisect
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from PIL import Image, ImageGrab
+from datetime import date, datetime, timedelta
 import tkinter as tk
 import tkinter.font as tkFont
 from customtkinter import (
@@ -16,11 +30,17 @@ from customtkinter import (
     CTkEntry,
     CTkTextbox,
     CTkImage,
+    CTkToplevel,
     set_appearance_mode,
     set_default_color_theme,
     filedialog,
 )
 
+try:  # 可选依赖：Windows 下的文件拖放
+    import windnd
+except ImportError:
+    windnd = None
+
 
 def resource_path(relative_path):
     """
@@ -31,6 +51,107 @@ def resource_path(relative_path):
     return os.path.join(os.path.abspath("."), relative_path)
 
 
+def get_rss():
+    """
+    获取当前进程的常驻内存（字节），不支持的平台返回 None
+    """
+    if sys.platform.startswith('win'):
+        size_t = ctypes.c_size_t
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", ctypes.c_ulong),
+                ("PageFaultCount", ctypes.c_ulong),
+                ("PeakWorkingSetSize", size_t),
+                ("WorkingSetSize", size_t),
+                ("QuotaPeakPagedPoolUsage", size_t),
+                ("QuotaPagedPoolUsage", size_t),
+                ("QuotaPeakNonPagedPoolUsage", size_t),
+                ("QuotaNonPagedPoolUsage", size_t),
+                ("PagefileUsage", size_t),
+                ("PeakPagefileUsage", size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.c_void_p(-1)  # 当前进程的伪句柄
+        if ctypes.windll.psapi.GetProcessMemoryInfo(
+            process, ctypes.byref(counters), counters.cb
+        ):
+            return counters.WorkingSetSize
+        return None
+    if os.path.exists("/proc/self/statm"):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return None
+
+
+def render_daily_format(DailyFormat: str, dt: datetime = None, lang: str = "zh") -> str:  # type: ignore
+    """
+    将 DailyFormat 渲染为日记的相对路径（不含扩展名）
+    """
+    mapping = {
+        "{YYYY}": "%Y",
+        "{YY}": "%y",
+        "{MM}": "%m",
+        "{DDDD}": "%j",
+        # "{DDD}": "%j",
+        "{DD}": "%d",
+        "{dddd}": "%A",
+        "{ddd}": "%a",
+        "{dd}": "%d",
+        "{d}": "%w",
+        "{HH}": "%H",
+        "{hh}": "%I",
+        "{mm}": "%M",
+        "{ss}": "%S",
+    }
+
+    mapping_lang = {
+        "Monday": "星期一",
+        "Tuesday": "星期二",
+        "Wednesday": "星期三",
+        "Thursday": "星期四",
+        "Friday": "星期五",
+        "Saturday": "星期六",
+        "Sunday": "星期日",
+        "Mon": "周一",
+        "Tue": "周二",
+        "Wed": "周三",
+        "Thu": "周四",
+        "Fri": "周五",
+        "Sat": "周六",
+        "Sun": "周日",
+        "Mo": "一",
+        "Tu": "二",
+        "We": "三",
+        "Th": "四",
+        "Fr": "五",
+        "Sa": "六",
+        "Su": "日",
+    }
+    dt = dt or datetime.now()
+    fmt = DailyFormat
+    for mjs, pyfmt in mapping.items():
+        fmt = fmt.replace(mjs, pyfmt)
+        fmt = dt.strftime(fmt)
+        if lang == "zh":
+            for mjs, pyfmt in mapping_lang.items():
+                fmt = fmt.replace(mjs, pyfmt)
+
+    return fmt
+
+
+def parse_iso_time(value):
+    """
+    解析 ISO 时间；带时区的时间换算为本机时间，保证日记日期与 [HH:MM:SS] 按本地时间计
+    """
+    dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
 class ToolTip:
     def __init__(self, widget, tipFont, text, scale, delay=500):
         self.widget = widget
@@ -108,7 +229,1250 @@ class ToolTip:
         self.text = text
 
 
+class AttachmentSaver:
+    """
+    将粘贴 / 拖入的图片保存到附件文件夹：编码与缩放在线程池中完成，文件名取内容哈希
+    """
+
+    imageExts = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp"}
+
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="attachment"
+        )
+
+    def submit_image(self, image, attachDir, maxWidth=0):
+        return self.executor.submit(self.save_image, image, attachDir, maxWidth)
+
+    def submit_file(self, src, attachDir, maxWidth=0):
+        return self.executor.submit(self.save_file, src, attachDir, maxWidth)
+
+    def save_image(self, image, attachDir, maxWidth=0):
+        # 哈希原始像素：重复粘贴同一截图时连编码都可以省掉
+        digest = hashlib.sha256()
+        digest.update(f"{image.mode}{image.size}".encode("utf-8"))
+        digest.update(image.tobytes())
+        name = digest.hexdigest()[:16] + ".png"
+        path = os.path.join(attachDir, name)
+        if os.path.exists(path):
+            return name
+
+        image = self.fit_width(image, maxWidth)
+        if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+            image = image.convert("RGBA")
+        self.write_atomic(path, lambda f: image.save(f, format="PNG", optimize=True))
+        return name
+
+    def save_file(self, src, attachDir, maxWidth=0):
+        digest = hashlib.sha256()
+        with open(src, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        ext = os.path.splitext(src)[1].lower()
+        name = digest.hexdigest()[:16] + ext
+        path = os.path.join(attachDir, name)
+        if os.path.exists(path):
+            return name
+
+        if ext in self.imageExts and ext != ".gif":
+            with Image.open(src) as image:
+                if maxWidth and image.width > maxWidth:
+                    fmt = image.format
+                    resized = self.fit_width(image, maxWidth)
+                    self.write_atomic(path, lambda f: resized.save(f, format=fmt))
+                    return name
+
+        def copy(f):
+            with open(src, "rb") as fsrc:
+                shutil.copyfileobj(fsrc, f, 1 << 20)
+
+        self.write_atomic(path, copy)
+        return name
+
+    def fit_width(self, image, maxWidth):
+        if not maxWidth or image.width <= maxWidth:
+            return image
+        height = max(1, round(image.height * maxWidth / image.width))
+        return image.resize((maxWidth, height), Image.LANCZOS)
+
+    def write_atomic(self, path, writer):
+        # 先写临时文件再替换，避免 Obsidian 读到写了一半的附件
+        # 同一哈希可能被两个任务同时保存（连按粘贴、重复拖入），临时文件名必须唯一
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                writer(f)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+class RecentKeys:
+    """
+    最近提交的幂等键（定长 LRU），用于拦截连按 Ctrl + S 造成的重复写入
+    """
+
+    def __init__(self, maxsize=64, window=10):
+        self.maxsize = maxsize
+        self.window = window  # 时间窗口（秒）
+        self.keys = OrderedDict()
+
+    def make_keys(self, *parts, now=None):
+        # 同时给出当前与上一个时间窗口的键，避免恰好跨越窗口边界时漏判
+        bucket = int((now if now is not None else time.time()) // self.window)
+        content = "\0".join(str(part) for part in parts)
+        return [
+            hashlib.sha1(f"{content}\0{b}".encode("utf-8")).hexdigest()
+            for b in (bucket, bucket - 1)
+        ]
+
+    def seen(self, keys):
+        for key in keys:
+            if key in self.keys:
+                self.keys.move_to_end(key)
+                return True
+        return False
+
+    def add(self, keys):
+        self.keys[keys[0]] = None
+        self.keys.move_to_end(keys[0])
+        while len(self.keys) > self.maxsize:
+            self.keys.popitem(last=False)
+
+    def clear(self):
+        self.keys.clear()
+
+
+class WriteError(Exception):
+    pass
+
+
+class DailyWriter:
+    """
+    日记写入器：GUI 与 HTTP 接口共用，保证同一时间只有一个线程改写日记
+    """
+
+    headingPattern = re.compile(r"^#{1,6}\s+.+$")
+    linePattern = re.compile(r"[^\n]*\n|[^\n]+$")
+    stampPattern = re.compile(r"\[(\d{2}:\d{2}:\d{2})\]\s*$")
+    templatePattern = re.compile(r"\{\{\s*(date|time|title)(?::([^}]*))?\s*\}\}")
+    momentPattern = re.compile(r"YYYY|YY|MM|DDDD|DD|dddd|ddd|dd|d|HH|hh|mm|ss")
+    undoSearchRadius = 64 * 1024  # 文件被改动后，撤销时只在原偏移附近查找
+
+    def __init__(self, journalSize=50):
+        self.locks = {}  # 每个日记文件一把锁，不同文件可以并行写入
+        self.locksGuard = threading.Lock()
+        self.queue = queue.Queue()
+        self.thread = None
+        self.threadLock = threading.Lock()
+        # 撤销日志：每次写入记录插入的字节偏移、内容及写入后的文件指纹；
+        # 写入线程、导入线程与 GUI 撤销共用，读写都要持有 journalLock
+        self.journal = deque(maxlen=journalSize)
+        self.journalLock = threading.Lock()
+        self.templateCache = {}  # (模板路径, 块标题) → (mtime_ns, 片段列表)
+
+    def write(self, filepath, entries, options, source=""):
+        """
+        同步写入一批条目；entries 为 {"text": str, "time": datetime} 列表，
+        source 标记写入来源（如 "gui"、"http"），撤销时按来源区分
+        """
+        with self.file_lock(filepath):
+            self.insert_entries(filepath, entries, options, source)
+        return len(entries)
+
+    def file_lock(self, filepath):
+        key = os.path.normcase(os.path.abspath(filepath))
+        with self.locksGuard:
+            if key not in self.locks:
+                self.locks[key] = threading.Lock()
+            return self.locks[key]
+
+    def submit(self, filepath, entries, options, source=""):
+        """
+        排队写入，返回 concurrent.futures.Future；排队期间同一文件的条目合并为一次写入
+        """
+        future = Future()
+        self.queue.put((filepath, entries, options, source, future))
+        with self.threadLock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="DailyWriter", daemon=True
+                )
+                self.thread.start()
+        return future
+
+    def run(self):
+        while True:
+            pending = [self.queue.get()]
+            while True:
+                try:
+                    pending.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            groups = OrderedDict()
+            for filepath, entries, options, source, future in pending:
+                key = (
+                    filepath,
+                    source,
+                    json.dumps(options, sort_keys=True, default=str),
+                )
+                if key not in groups:
+                    groups[key] = (filepath, options, source, [], [])
+                groups[key][3].extend(entries)
+                groups[key][4].append((future, len(entries)))
+
+            for filepath, options, source, entries, futures in groups.values():
+                try:
+                    self.write(filepath, entries, options, source)
+                except Exception as e:
+                    for future, _ in futures:
+                        future.set_exception(e)
+                else:
+                    for future, count in futures:
+                        future.set_result(count)
+
+    def format_entry(self, entry, options, newline="\n"):
+        text = entry["text"]
+        if options["ifTimeStamp"]:
+            text = text + " [" + entry["time"].strftime("%H:%M:%S") + "]"
+        return ("\n" + text + "\n").replace("\n", newline)
+
+    def fingerprint(self, filepath):
+        st = os.stat(filepath)
+        return st.st_size, st.st_mtime_ns
+
+    def route_entry(self, entry, options):
+        # 显式指定的块优先，其次按标签路由，最后落到默认块
+        if entry.get("block"):
+            return entry["block"].strip()
+        for tag, block in options["BlockRoutes"].items():
+            if re.search(r"(?:^|\s)" + re.escape(tag) + r"(?=\s|$)", entry["text"]):
+                return block.strip()
+        return options["BlockName"].strip()
+
+    def find_blocks(self, lines, names):
+        """
+        一次遍历定位多个块，返回 {块标题: (标题行, 块末尾)}
+        """
+        starts = {}
+        headings = []
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if stripped in names and stripped not in starts:
+                starts[stripped] = i
+                headings.append(i)
+            elif self.headingPattern.match(stripped):
+                headings.append(i)
+
+        blocks = {}
+        for name, start in starts.items():
+            end = bisect.bisect_right(headings, start)
+            blocks[name] = (start, headings[end] if end < len(headings) else len(lines))
+        return blocks
+
+    def insert_entries(self, filepath, entries, options, source=""):
+        exists = os.path.exists(filepath)
+        if exists:
+            with open(filepath, "rb") as f:
+                text = f.read().decode("utf-8")
+        elif options.get("ifCreateNote"):
+            # 新日记在内存中套用模板，与条目合并后只写一次
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            text = self.render_template(
+                self.load_template(options), filepath, entries[0]["time"]
+            )
+        else:
+            raise WriteError("日记文件不存在")
+        # 保留原文件的换行符，以便按字节精确记录插入位置
+        newline = "\r\n" if "\r\n" in text else "\n"
+        lines = self.linePattern.findall(text)
+
+        default = options["BlockName"].strip()
+        targets = [self.route_entry(entry, options) for entry in entries]
+        blocks = self.find_blocks(lines, set(targets) | {default})
+        if any(t not in blocks for t in targets) and default not in blocks:
+            raise WriteError("找不到指定块")
+
+        # 按目标块分组；路由目标不存在时退回默认块
+        byBlock = {}
+        for entry, target in zip(entries, targets):
+            byBlock.setdefault(target if target in blocks else default, []).append(entry)
+
+        inserts = {}
+        chronological = options.get("ifChronological") and options["ifTimeStamp"]
+        for name, items in byBlock.items():
+            start, end = blocks[name]
+            if chronological:
+                items.sort(key=lambda entry: entry["time"].strftime("%H:%M:%S"))
+                positions = self.chronological_positions(lines, start, end, items)
+            else:
+                positions = [end] * len(items)  # 插入到块末尾
+            for entry, index in zip(items, positions):
+                inserts.setdefault(index, []).append(
+                    self.format_entry(entry, options, newline)
+                )
+
+        data, spans = self.merge_inserts(lines, inserts)
+        if not exists:
+            try:
+                with open(filepath, "xb") as f:
+                    f.write(data)
+            except FileExistsError:
+                # 其他程序（如 Obsidian）刚好先创建了日记，改为写入它创建的内容
+                return self.insert_entries(filepath, entries, options, source)
+            self.record(filepath, source, spans)
+            return
+
+        snapshot = None
+        if options.get("BackupCount", 0) > 0:
+            try:
+                snapshot = self.backup(filepath, options)
+            except OSError:
+                pass  # 备份失败（如磁盘已满）不应挡住这次记录
+        try:
+            if snapshot is None or not self.replace_file(filepath, data):
+                if snapshot is not None:
+                    # 替换失败（如 Windows 上日记正被占用）：先把硬链接备份换成副本，
+                    # 再原地写入，避免连同备份一起改掉
+                    os.remove(snapshot)
+                    try:
+                        self.copy_snapshot(filepath, snapshot)
+                    except OSError:
+                        pass
+                with open(filepath, "wb") as f:
+                    f.write(data)
+        except OSError as e:
+            raise WriteError(f"写入日记失败：{e.strerror or e}")
+        self.record(filepath, source, spans)
+
+    def replace_file(self, filepath, data):
+        """
+        把新内容写到临时文件再替换原文件，返回是否成功；失败时原文件保持不变
+        """
+        tmp = f"{filepath}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            shutil.copymode(filepath, tmp)
+            os.replace(tmp, filepath)
+            return True
+        except OSError:
+            return False
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def record(self, filepath, source, spans):
+        record = {
+            "path": filepath,
+            "source": source,
+            "spans": spans,
+            "after": self.fingerprint(filepath),
+        }
+        with self.journalLock:
+            self.journal.append(record)
+
+    def prepare_note(self, filepath, options):
+        """
+        空闲时调用：预建日记所在目录并预热模板缓存
+        """
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        self.load_template(options)
+
+    def load_template(self, options):
+        """
+        模板只解析一次（按文件 mtime 缓存）：拆成文本与 {{date}} / {{time}} / {{title}}
+        占位符的片段列表；模板中没有块标题时自动补上
+        """
+        templatePath = options.get("TemplatePath", "")
+        blockName = options["BlockName"].strip()
+        try:
+            mtime = os.stat(templatePath).st_mtime_ns if templatePath else 0
+        except OSError:
+            raise WriteError("模板文件不存在")
+        key = (templatePath, blockName)
+        cached = self.templateCache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        text = ""
+        if templatePath:
+            try:
+                with open(templatePath, "r", encoding="utf-8-sig", newline="") as f:
+                    text = f.read()
+            except OSError:
+                raise WriteError("模板文件不存在")
+        if not any(line.strip() == blockName for line in text.splitlines()):
+            newline = "\r\n" if "\r\n" in text else "\n"
+            if text.strip():
+                text = text.rstrip("\r\n") + newline * 2
+            text = text + blockName + newline
+
+        pieces = []
+        last = 0
+        for match in self.templatePattern.finditer(text):
+            pieces.append(text[last : match.start()])
+            pieces.append((match.group(1), match.group(2)))
+            last = match.end()
+        pieces.append(text[last:])
+        self.templateCache[key] = (mtime, pieces)
+        return pieces
+
+    def render_template(self, pieces, filepath, dt):
+        rendered = []
+        for piece in pieces:
+            if isinstance(piece, str):
+                rendered.append(piece)
+            elif piece[0] == "title":
+                rendered.append(os.path.splitext(os.path.basename(filepath))[0])
+            elif piece[1]:
+                # {{date:YYYY-MM-DD}} 使用 Obsidian（moment）风格的格式
+                fmt = self.momentPattern.sub(lambda m: "{" + m.group() + "}", piece[1])
+                rendered.append(render_daily_format(fmt, dt))
+            else:
+                rendered.append(dt.strftime("%Y-%m-%d" if piece[0] == "date" else "%H:%M"))
+        return "".join(rendered)
+
+    def backup(self, filepath, options):
+        """
+        写入前为日记保留一个版本；以硬链接方式完成时返回备份路径（调用方须替换原文件），
+        否则返回 None。优先硬链接（零拷贝），其次写时复制（reflink），最后分块复制
+        """
+        folder, name = os.path.split(filepath)
+        backupDir = os.path.join(folder, ".quickdaily", name)
+        os.makedirs(backupDir, exist_ok=True)
+        snapshot = os.path.join(
+            backupDir, datetime.now().strftime("%Y%m%d-%H%M%S-%f") + ".md"
+        )
+
+        hardlinked = False
+        # 符号链接指向的日记不能走“硬链接 + 替换”，否则替换后链接变成普通文件
+        if not os.path.islink(filepath):
+            try:
+                os.link(filepath, snapshot)
+                hardlinked = True
+            except OSError:
+                pass
+        if not hardlinked:
+            self.copy_snapshot(filepath, snapshot)
+        try:
+            self.prune_backups(
+                backupDir, options["BackupCount"], options.get("BackupDays", 0)
+            )
+        except OSError:
+            pass  # 清理留到下次备份或每日清理
+        return snapshot if hardlinked else None
+
+    def copy_snapshot(self, filepath, snapshot):
+        if self.reflink(filepath, snapshot):
+            return
+        try:
+            with open(filepath, "rb") as fsrc, open(snapshot, "wb") as fdst:
+                shutil.copyfileobj(fsrc, fdst, 1 << 20)
+        except OSError:
+            if os.path.exists(snapshot):
+                os.remove(snapshot)  # 不留下不完整的备份
+            raise
+
+    def reflink(self, src, dst):
+        try:
+            if sys.platform.startswith("linux"):
+                import fcntl
+
+                with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                    fcntl.ioctl(fdst.fileno(), 0x40049409, fsrc.fileno())  # FICLONE
+                return True
+            if sys.platform.startswith("darwin"):
+                libc = ctypes.CDLL(None, use_errno=True)
+                return libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+        except OSError:
+            if os.path.exists(dst):
+                os.remove(dst)
+        return False
+
+    def prune_backups(self, backupDir, keep=None, days=0):
+        """
+        按数量（keep 为 None 时不限）和天数清理一篇日记的备份，返回剩余的备份数
+        """
+        # 文件名即备份时间，按名称排序即按时间排序
+        names = sorted(name for name in os.listdir(backupDir) if name.endswith(".md"))
+        expire = datetime.now().timestamp() - days * 86400
+        remaining = len(names)
+        for i, name in enumerate(names):
+            try:
+                created = datetime.strptime(name[:-3], "%Y%m%d-%H%M%S-%f").timestamp()
+            except ValueError:
+                continue
+            old = days > 0 and created < expire
+            if (keep is not None and i < len(names) - keep) or old:
+                try:
+                    os.remove(os.path.join(backupDir, name))
+                    remaining -= 1
+                except FileNotFoundError:
+                    pass
+        return remaining
+
+    def sweep_backups(self, rootDir, days):
+        """
+        按天数清理 rootDir 下所有 .quickdaily 备份目录：过了当天就不再写入的日记
+        不会再触发 backup()，需要由这里定期清理，并删除清空的目录
+        """
+        if days <= 0:
+            return
+        for folder, dirs, _ in os.walk(rootDir):
+            if ".quickdaily" in dirs:
+                backupRoot = os.path.join(folder, ".quickdaily")
+                for name in os.listdir(backupRoot):
+                    backupDir = os.path.join(backupRoot, name)
+                    if os.path.isdir(backupDir) and not self.prune_backups(
+                        backupDir, None, days
+                    ):
+                        os.rmdir(backupDir)
+                if not os.listdir(backupRoot):
+                    os.rmdir(backupRoot)
+            # 不进入 .obsidian、.git 等隐藏目录
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+
+    def chronological_positions(self, lines, start, end, entries):
+        """
+        解析块内已有的 [HH:MM:SS] 一次，再为每个（已按时间排序的）条目二分查找插入行
+        """
+        stamps = []
+        after = []
+        for i in range(start + 1, end):
+            match = self.stampPattern.search(lines[i])
+            if match:
+                stamps.append(match.group(1))
+                after.append(i + 1)
+        if not stamps:
+            return [end] * len(entries)
+
+        positions = []
+        for entry in entries:
+            k = bisect.bisect_right(stamps, entry["time"].strftime("%H:%M:%S"))
+            if k == len(stamps):
+                positions.append(end)
+            elif k == 0:
+                positions.append(start + 1)
+            else:
+                positions.append(after[k - 1])
+        return positions
+
+    def merge_inserts(self, lines, inserts):
+        """
+        inserts 为 {行号: [待插入文本]}，单次遍历拼出新内容；
+        返回 (文件字节, [(插入字节偏移, 插入字节)])
+        """
+        merged = []
+        spans = []
+        offset = 0
+        last = 0
+        for i in sorted(inserts):
+            kept = "".join(lines[last:i]).encode("utf-8")
+            chunk = "".join(inserts[i]).encode("utf-8")
+            offset += len(kept)
+            spans.append((offset, chunk))
+            offset += len(chunk)
+            merged += [kept, chunk]
+            last = i
+        merged.append("".join(lines[last:]).encode("utf-8"))
+        return b"".join(merged), spans
+
+    def undo_last(self, source=None):
+        """
+        撤销最近一次（指定来源的）写入：文件未变动时直接按偏移删除，否则只在偏移附近做有限查找。
+        无法撤销的记录先保留并标记，再次撤销时只丢弃它，不会连带删掉更早的写入
+        """
+        with self.journalLock:
+            record = next(
+                (
+                    r
+                    for r in reversed(self.journal)
+                    if source is None or r["source"] == source
+                ),
+                None,
+            )
+        if record is None:
+            raise WriteError("没有可撤销的记录")
+        if record.get("refused"):
+            self.discard(record)
+            raise WriteError("已跳过无法撤销的记录")
+        try:
+            count = self.splice_out(record)
+        except WriteError:
+            record["refused"] = True
+            raise
+        self.discard(record)
+        return count
+
+    def discard(self, record):
+        with self.journalLock:
+            for i, r in enumerate(self.journal):
+                if r is record:
+                    del self.journal[i]
+                    return
+
+    def splice_out(self, record):
+        filepath = record["path"]
+        with self.file_lock(filepath):
+            if not os.path.exists(filepath):
+                raise WriteError("日记文件不存在")
+
+            unchanged = self.fingerprint(filepath) == record["after"]
+            with open(filepath, "r+b") as f:
+                if unchanged:
+                    spans = record["spans"]
+                else:
+                    spans = [
+                        (self.locate_span(f, offset, chunk), chunk)
+                        for offset, chunk in record["spans"]
+                    ]
+                    if None in (offset for offset, _ in spans):
+                        raise WriteError("记录已被修改，无法撤销")
+
+                # 只重写第一处插入之后的内容
+                head = min(offset for offset, _ in spans)
+                f.seek(head)
+                tail = f.read()
+                kept = []
+                last = 0
+                for offset, chunk in sorted(spans):
+                    start = offset - head
+                    if start < last or tail[start : start + len(chunk)] != chunk:
+                        raise WriteError("记录已被修改，无法撤销")
+                    kept.append(tail[last:start])
+                    last = start + len(chunk)
+                kept.append(tail[last:])
+                f.seek(head)
+                f.write(b"".join(kept))
+                f.truncate()
+        return len(record["spans"])
+
+    def locate_span(self, f, offset, chunk):
+        start = max(0, offset - self.undoSearchRadius)
+        f.seek(start)
+        window = f.read(offset - start + len(chunk) + self.undoSearchRadius)
+        # 取离原偏移最近的一处匹配
+        best = None
+        found = window.find(chunk)
+        while found != -1:
+            if best is None or abs(start + found - offset) < abs(best - offset):
+                best = start + found
+            found = window.find(chunk, found + 1)
+        return best
+
+
+class CaptureServer:
+    """
+    仅监听本机的 HTTP 收集接口（asyncio），POST /entries 写入当天日记
+
+    请求体为 JSON：{"text": "..."}、{"entries": [...]} 或直接为列表，
+    列表元素可以是字符串，或 {"text": "...", "time": "ISO 时间", "block": "## 标题"}，
+    后两项可选。
+    """
+
+    host = "127.0.0.1"
+    maxBody = 1 << 20
+    idleTimeout = 30
+    reasons = {
+        200: "OK",
+        204: "No Content",
+        400: "Bad Request",
+        401: "Unauthorized",
+        403: "Forbidden",
+        404: "Not Found",
+        405: "Method Not Allowed",
+        411: "Length Required",
+        413: "Payload Too Large",
+        415: "Unsupported Media Type",
+        422: "Unprocessable Entity",
+        500: "Internal Server Error",
+    }
+
+    def __init__(self, writer, resolve, port=27183, token=""):
+        self.writer = writer
+        self.resolve = resolve  # resolve(dt) -> (日记路径, 写入选项)
+        self.port = port
+        self.token = token
+        self.loop = None
+        self.server = None
+        self.error = None
+        self.ready = threading.Event()
+        self.thread = None
+
+    def start(self, timeout=2):
+        self.thread = threading.Thread(
+            target=self.run, name="CaptureServer", daemon=True
+        )
+        self.thread.start()
+        self.ready.wait(timeout)
+        return self.server is not None
+
+    def stop(self):
+        if self.loop is not None and self.server is not None:
+            self.loop.call_soon_threadsafe(self.server.close)
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ready.set()
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        try:
+            self.server = await asyncio.start_server(self.handle, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]  # port=0 时取实际端口
+        finally:
+            self.ready.set()
+        async with self.server:
+            try:
+                await self.server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await asyncio.wait_for(
+                    self.read_request(reader), self.idleTimeout
+                )
+                if request is None:
+                    break
+                method, path, version, headers, body, error = request
+                keepAlive = (
+                    headers.get("connection", "").lower() != "close"
+                    if version == "HTTP/1.1"
+                    else headers.get("connection", "").lower() == "keep-alive"
+                )
+                if error:
+                    # 请求体未被读取，无法继续复用该连接
+                    self.send(writer, error, {}, {"error": "unsupported body"}, False)
+                    await writer.drain()
+                    break
+                status, extra, payload = await self.dispatch(
+                    method, path, headers, body
+                )
+                self.send(writer, status, extra, payload, keepAlive)
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except (
+            ValueError,
+            ConnectionError,
+            asyncio.TimeoutError,
+            asyncio.IncompleteReadError,
+        ):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        method, path, version = line.decode("latin-1").split()
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= 100:
+                raise ConnectionError("too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "transfer-encoding" in headers:
+            return method, path, version, headers, b"", 411
+        length = int(headers.get("content-length", "0") or 0)
+        if length > self.maxBody:
+            return method, path, version, headers, b"", 413
+        body = await reader.readexactly(length) if length else b""
+        return method, path, version, headers, body, None
+
+    async def dispatch(self, method, path, headers, body):
+        # 只接受以本机地址访问的请求，防止网页借 DNS 重绑定以同源身份写入日记
+        if headers.get("host", "").lower() not in (
+            f"127.0.0.1:{self.port}",
+            f"localhost:{self.port}",
+        ):
+            return 403, {}, {"error": "invalid host"}
+        if path.split("?", 1)[0] != "/entries":
+            return 404, {}, {"error": "not found"}
+        cors = {}
+        if self.token:
+            # 只有设置了口令才允许浏览器跨域（书签脚本）调用
+            cors = {
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Methods": "POST, OPTIONS",
+                "Access-Control-Allow-Headers": "Content-Type, X-QuickDaily-Token",
+            }
+        if method == "OPTIONS":
+            return 204, cors, None
+        if method != "POST":
+            return 405, {"Allow": "POST, OPTIONS"}, {"error": "method not allowed"}
+        if self.token and headers.get("x-quickdaily-token") != self.token:
+            return 401, cors, {"error": "invalid token"}
+        # 要求 JSON 请求体，浏览器无法以“简单请求”绕过预检直接写入
+        if not headers.get("content-type", "").startswith("application/json"):
+            return 415, cors, {"error": "content-type must be application/json"}
+
+        try:
+            entries = self.parse_entries(json.loads(body.decode("utf-8")))
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, cors, {"error": f"invalid entries: {e}"}
+
+        groups = OrderedDict()
+        for entry in entries:
+            filepath, options = self.resolve(entry["time"])
+            groups.setdefault(filepath, (options, []))[1].append(entry)
+        futures = [
+            asyncio.wrap_future(self.writer.submit(filepath, items, options, "http"))
+            for filepath, (options, items) in groups.items()
+        ]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        errors = [str(r) for r in results if isinstance(r, Exception)]
+        written = sum(r for r in results if not isinstance(r, Exception))
+        if errors:
+            return 422, cors, {"written": written, "errors": errors}
+        return 200, cors, {"written": written}
+
+    def parse_entries(self, data):
+        if isinstance(data, dict):
+            data = data["entries"] if "entries" in data else [data]
+        if not isinstance(data, list) or not data:
+            raise ValueError("expected a non-empty list")
+        entries = []
+        for item in data:
+            if isinstance(item, str):
+                item = {"text": item}
+            text = item["text"]
+            if not isinstance(text, str) or text == "":
+                raise ValueError("text must be a non-empty string")
+            dt = parse_iso_time(item["time"]) if item.get("time") else None
+            entry = {"text": text, "time": dt or datetime.now()}
+            if item.get("block"):
+                entry["block"] = str(item["block"])
+            entries.append(entry)
+        return entries
+
+    def send(self, writer, status, extra, payload, keepAlive):
+        body = b""
+        if payload is not None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {self.reasons.get(status, '')}",
+            f"Content-Length: {len(body)}",
+            "Connection: " + ("keep-alive" if keepAlive else "close"),
+        ]
+        if body:
+            head.append("Content-Type: application/json; charset=utf-8")
+        head += [f"{k}: {v}" for k, v in extra.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+
+class BulkImporter:
+    """
+    批量导入（CSV / JSONL）：按各条目自身时间渲染 DailyFormat，按文件分组，
+    每篇日记只读写一次，多篇日记由线程池并行处理
+    """
+
+    timeTokens = ("{HH}", "{hh}", "{mm}", "{ss}")
+    epochPattern = re.compile(r"^\s*\d+(\.\d+)?\s*$")
+    maxSkipReports = 50  # 逐行报告的跳过条数上限，其余只计数
+
+    def __init__(self, settings, workers=None, report=print):
+        self.VaultDir = settings.get("VaultDir", "")
+        self.DailyFormat = settings.get("DailyFormat", "")
+        self.options = {
+            "BlockName": settings.get("BlockName", ""),
+            "ifTimeStamp": settings.get("ifTimeStamp", False),
+            "BlockRoutes": settings.get("BlockRoutes", {}),
+            "ifChronological": settings.get("ifChronological", False),
+            "BackupCount": settings.get("BackupCount", 10),
+            "BackupDays": settings.get("BackupDays", 7),
+            "ifCreateNote": settings.get("ifCreateNote", True),
+            "TemplatePath": (
+                os.path.join(self.VaultDir, settings["TemplatePath"])
+                if settings.get("TemplatePath")
+                else ""
+            ),
+        }
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 4)
+        self.report = report
+        self.writer = DailyWriter(journalSize=0)
+        self.pathCache = {}
+        self.skipped = 0
+
+    def read_entries(self, source):
+        """
+        逐行读取条目；格式错误的行记录为 “文件:行号” 后跳过，不中断整个导入
+        """
+        with open(source, "r", encoding="utf-8-sig", newline="") as f:
+            if source.lower().endswith(".csv"):
+                reader = csv.DictReader(f)
+                rows = ((reader.line_num, row) for row in reader)
+            else:
+                rows = (
+                    (lineno, line) for lineno, line in enumerate(f, 1) if line.strip()
+                )
+            for lineno, row in rows:
+                try:
+                    if isinstance(row, str):
+                        row = json.loads(row)
+                    if not row.get("text"):
+                        continue
+                    entry = {"text": row["text"], "time": self.parse_time(row["time"])}
+                    if row.get("block"):
+                        entry["block"] = row["block"]
+                except (
+                    ValueError,
+                    TypeError,
+                    KeyError,
+                    AttributeError,
+                    OverflowError,
+                    OSError,
+                ) as e:
+                    self.skipped += 1
+                    if self.skipped <= self.maxSkipReports:
+                        self.report(f"跳过 {source}:{lineno}（{type(e).__name__}: {e}）")
+                    continue
+                yield entry
+
+    def parse_time(self, value):
+        if isinstance(value, (int, float)) or self.epochPattern.match(str(value)):
+            value = float(value)
+            if value > 1e11:  # 毫秒时间戳
+                value /= 1000
+            return datetime.fromtimestamp(value)
+        return parse_iso_time(value)
+
+    def daily_path(self, dt):
+        # 格式中不含时分秒时，同一天的条目共用一次渲染结果
+        key = dt if any(t in self.DailyFormat for t in self.timeTokens) else dt.date()
+        if key not in self.pathCache:
+            self.pathCache[key] = os.path.join(
+                self.VaultDir, render_daily_format(self.DailyFormat, dt) + ".md"
+            )
+        return self.pathCache[key]
+
+    def run(self, source):
+        started = time.perf_counter()
+        groups = {}
+        for entry in self.read_entries(source):
+            groups.setdefault(self.daily_path(entry["time"]), []).append(entry)
+        total = sum(len(entries) for entries in groups.values())
+        self.report(f"读取 {total} 条记录，共 {len(groups)} 篇日记，跳过 {self.skipped} 行")
+
+        written = 0
+        failed = []
+        lastReport = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self.write_note, filepath, entries): filepath
+                for filepath, entries in groups.items()
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    written += future.result()
+                except Exception as e:
+                    failed.append((futures[future], str(e)))
+                now = time.perf_counter()
+                if now - lastReport >= 1 or done == len(futures):
+                    lastReport = now
+                    self.report(
+                        f"{done}/{len(futures)} 篇日记，{written} 条记录，"
+                        f"{written / max(now - started, 1e-9):.0f} 条/秒"
+                    )
+
+        for filepath, message in failed:
+            self.report(f"失败：{filepath}（{message}）")
+        return written, failed
+
+    def write_note(self, filepath, entries):
+        entries.sort(key=lambda entry: entry["time"])
+        return self.writer.write(filepath, entries, self.options, "import")
+
+
+class VaultCalendar:
+    """
+    日记日历数据：把 DailyFormat 反解为逐级目录匹配，用 os.scandir 查找已有日记；
+    目录列表按目录 mtime 缓存，记录条数按文件 (size, mtime) 缓存，只重扫有变动的部分
+    """
+
+    tokenPattern = re.compile(r"\{(YYYY|YY|MM|DDDD|DD|dddd|ddd|dd|d|HH|hh|mm|ss)\}")
+    tokenRegex = {
+        "YYYY": ("Y", r"\d{4}"),
+        "YY": ("y", r"\d{2}"),
+        "MM": ("m", r"\d{2}"),
+        "DDDD": ("j", r"\d{3}"),
+        "DD": ("d", r"\d{2}"),
+        "dd": ("d", r"\d{2}"),
+        "dddd": (None, r".+?"),
+        "ddd": (None, r".+?"),
+        "d": (None, r"\d"),
+        "HH": (None, r"\d{2}"),
+        "hh": (None, r"\d{2}"),
+        "mm": (None, r"\d{2}"),
+        "ss": (None, r"\d{2}"),
+    }
+
+    def __init__(self, writer):
+        self.writer = writer  # 复用其中的块定位逻辑
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="calendar")
+        self.dirCache = {}  # 目录 → (mtime_ns, [(名称, 是否目录)])
+        self.countCache = {}  # 日记 → ((size, mtime_ns), 记录条数)
+        self.counts = {}  # 上一次扫描结果：date → 记录条数
+
+    def clear(self):
+        self.dirCache.clear()
+        self.countCache.clear()
+        self.counts = {}
+
+    def submit(self, VaultDir, DailyFormat, blockNames, ifTimeStamp=False):
+        return self.executor.submit(
+            self.scan, VaultDir, DailyFormat, blockNames, ifTimeStamp
+        )
+
+    def build_matchers(self, DailyFormat):
+        matchers = []
+        for segment in (DailyFormat + ".md").split("/"):
+            pattern = ""
+            seen = set()
+            last = 0
+            for match in self.tokenPattern.finditer(segment):
+                pattern += re.escape(segment[last : match.start()])
+                group, regex = self.tokenRegex[match.group(1)]
+                if group is None:
+                    pattern += f"(?:{regex})"
+                elif group in seen:
+                    pattern += f"(?P={group})"
+                else:
+                    pattern += f"(?P<{group}>{regex})"
+                    seen.add(group)
+                last = match.end()
+            pattern += re.escape(segment[last:])
+            matchers.append(re.compile(pattern))
+        return matchers
+
+    def list_dir(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        cached = self.dirCache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with os.scandir(path) as it:
+            entries = [(entry.name, entry.is_dir()) for entry in it]
+        self.dirCache[path] = (mtime, entries)
+        return entries
+
+    def scan(self, VaultDir, DailyFormat, blockNames, ifTimeStamp=False):
+        matchers = self.build_matchers(DailyFormat)
+        level = [(VaultDir, {})]
+        for depth, matcher in enumerate(matchers):
+            isFile = depth == len(matchers) - 1
+            found = []
+            for path, groups in level:
+                for name, isDir in self.list_dir(path):
+                    match = matcher.fullmatch(name)
+                    if match is None or isDir == isFile:
+                        continue
+                    captured = match.groupdict()
+                    # 不同层级出现同一字段时（如 {YYYY}/{YYYY}-{MM}）必须一致
+                    if any(groups.get(k, v) != v for k, v in captured.items()):
+                        continue
+                    found.append((os.path.join(path, name), {**groups, **captured}))
+            level = found
+
+        counts = {}
+        for path, groups in level:
+            day = self.parse_date(groups)
+            if day is not None:
+                counts[day] = counts.get(day, 0) + self.count_entries(
+                    path, blockNames, ifTimeStamp
+                )
+        self.counts = counts
+        return counts
+
+    def parse_date(self, groups):
+        try:
+            if "Y" in groups:
+                year = int(groups["Y"])
+            elif "y" in groups:
+                year = 2000 + int(groups["y"])
+            else:
+                return None
+            if "m" in groups and "d" in groups:
+                return date(year, int(groups["m"]), int(groups["d"]))
+            if "j" in groups:
+                return date.fromordinal(date(year, 1, 1).toordinal() + int(groups["j"]) - 1)
+        except ValueError:
+            pass
+        return None
+
+    def count_entries(self, path, blockNames, ifTimeStamp=False):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return 0
+        stamp = (st.st_size, st.st_mtime_ns, ifTimeStamp)
+        cached = self.countCache.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.readlines()
+        # 开启时间戳时每条记录以 [HH:MM:SS] 结尾，按时间戳计数，
+        # 不受模板文字和多段落记录影响；否则退回按空行分隔的段落计数
+        count = 0
+        for start, end in self.writer.find_blocks(lines, blockNames).values():
+            previous = ""
+            for line in lines[start + 1 : end]:
+                if ifTimeStamp:
+                    if self.writer.stampPattern.search(line):
+                        count += 1
+                elif line.strip() and not previous.strip():
+                    count += 1
+                previous = line
+        self.countCache[path] = (stamp, count)
+        return count
+
+
+class CalendarView:
+    """
+    月历窗口：有日记的日期高亮并显示记录条数
+    """
+
+    weekdays = ["一", "二", "三", "四", "五", "六", "日"]
+
+    def __init__(self, master, fontFamily, counts):
+        self.counts = counts
+        self.month = date.today().replace(day=1)
+        self.window = CTkToplevel(master)
+        self.window.title("日记日历")
+        self.window.resizable(False, False)
+        self.window.attributes("-topmost", True)
+
+        font = CTkFont(family=fontFamily, size=15)
+        header = CTkFrame(master=self.window, fg_color="transparent")
+        header.pack(fill="x", padx=10, pady=(10, 5))
+        CTkButton(
+            master=header,
+            text="<",
+            width=30,
+            height=28,
+            corner_radius=8,
+            fg_color=("#24aca9", "#29c7c2"),
+            text_color=("gray98", "#46484a"),
+            hover_color=("#29c7c2", "#24aca9"),
+            font=font,
+            command=lambda: self.shift_month(-1),
+        ).pack(side="left")
+        CTkButton(
+            master=header,
+            text=">",
+            width=30,
+            height=28,
+            corner_radius=8,
+            fg_color=("#24aca9", "#29c7c2"),
+            text_color=("gray98", "#46484a"),
+            hover_color=("#29c7c2", "#24aca9"),
+            font=font,
+            command=lambda: self.shift_month(1),
+        ).pack(side="right")
+        self.LabelMonth = CTkLabel(master=header, text="", font=font)
+        self.LabelMonth.pack(side="left", expand=1)
+
+        grid = CTkFrame(master=self.window, fg_color=("#dcdcdc", "#2b2b2b"))
+        grid.pack(padx=10, pady=(0, 10))
+        for col, name in enumerate(self.weekdays):
+            CTkLabel(master=grid, text=name, width=44, height=24, font=font).grid(
+                row=0, column=col, padx=2, pady=2
+            )
+        self.cells = []
+        for row in range(6):
+            for col in range(7):
+                cell = CTkLabel(
+                    master=grid,
+                    text="",
+                    width=44,
+                    height=40,
+                    corner_radius=8,
+                    font=CTkFont(family=fontFamily, size=13),
+                )
+                cell.grid(row=row + 1, column=col, padx=2, pady=2)
+                self.cells.append(cell)
+        self.render()
+
+    def exists(self):
+        return bool(self.window.winfo_exists())
+
+    def set_counts(self, counts):
+        self.counts = counts
+        if self.exists():
+            self.render()
+
+    def shift_month(self, step):
+        index = self.month.year * 12 + self.month.month - 1 + step
+        self.month = date(index // 12, index % 12 + 1, 1)
+        self.render()
+
+    def render(self):
+        self.LabelMonth.configure(text=f"{self.month.year}年{self.month.month}月")
+        weeks = calendar.monthcalendar(self.month.year, self.month.month)
+        days = [day for week in weeks for day in week]
+        days += [0] * (len(self.cells) - len(days))
+        today = date.today()
+        for cell, day in zip(self.cells, days):
+            if day == 0:
+                cell.configure(text="", fg_color="transparent")
+                continue
+            current = self.month.replace(day=day)
+            if current in self.counts:
+                count = self.counts[current]
+                cell.configure(
+                    text=f"{day}\n{count if count else '·'}",
+                    fg_color=("#24aca9", "#29c7c2") if count else ("#F9F9FA", "#46484a"),
+                )
+            else:
+                cell.configure(text=str(day), fg_color="transparent")
+            cell.configure(
+                text_color=(
+                    ("#e0533d", "#ff8a75") if current == today else ("#030303", "#ffffff")
+                )
+            )
+
+
 class App(CTk):
+    settingWidgets = (
+        "FrameVaultDir",
+        "LabelVaultDir",
+        "EntryVaultDir",
+        "ButtonVaultDir",
+        "ButtonTheme",
+        "ButtonTimeStamp",
+        "FrameDailyFormat",
+        "LabelDailyFormat",
+        "EntryDailyFormat",
+        "ButtonDailyName",
+        "FrameBlockName",
+        "LabelBlockName",
+        "EntryBlockName",
+        "ButtonBlockName",
+        "ButtonCalendar",
+        "ToolTipButtonTimeStamp",
+        "ToolTipButtonTheme",
+        "ToolTipButtonCalendar",
+    )
+
     def get_available_fonts(self):
         root = tk.Tk()
         root.withdraw()
@@ -159,6 +1523,19 @@ class App(CTk):
         self.scale = self.get_dpi()
         self.DailyName = ""
         self.DailyPath = ""
+        self.attachmentSaver = AttachmentSaver()
+        self.recentKeys = RecentKeys()
+        self.writer = DailyWriter()
+        self.captureServer = None
+        self.vaultCalendar = VaultCalendar(self.writer)
+        self.calendarView = None
+        self.icons = {}
+        self.normalGeometry = ""
+        self.dailyNames = {}  # (日记格式, 日期) → 预渲染的日记名
+        self.dailyNamesLock = threading.Lock()  # Tk 线程与 HTTP 线程共用
+        self.lastBackupSweep = 0
+        self.templateWarned = False  # 预建日记时的模板错误只提示一次
+        self.idleExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idle")
 
         # ----------------------------------#
         #             可保存变量
@@ -185,6 +1562,62 @@ class App(CTk):
             self.DailyFormat = data["DailyFormat"] if "DailyFormat" in data else ""
             self.BlockName = data["BlockName"] if "BlockName" in data else ""
             self.QuickAddText = data["QuickAddText"] if "QuickAddText" in data else ""
+            self.AttachmentDir = (
+                data["AttachmentDir"] if "AttachmentDir" in data else "attachments"
+            )
+            self.ImageMaxWidth = (
+                data["ImageMaxWidth"]
+                if ("ImageMaxWidth" in data) and isinstance(data["ImageMaxWidth"], int)
+                else 1920
+            )
+            self.HttpEnabled = (
+                data["HttpEnabled"]
+                if ("HttpEnabled" in data) and (data["HttpEnabled"] in [True, False])
+                else False
+            )
+            self.HttpPort = (
+                data["HttpPort"]
+                if ("HttpPort" in data) and isinstance(data["HttpPort"], int)
+                else 27183
+            )
+            self.HttpToken = data["HttpToken"] if "HttpToken" in data else ""
+            self.BlockRoutes = (
+                data["BlockRoutes"]
+                if ("BlockRoutes" in data) and isinstance(data["BlockRoutes"], dict)
+                else {}
+            )
+            self.ifChronological = (
+                data["ifChronological"]
+                if ("ifChronological" in data)
+                and (data["ifChronological"] in [True, False])
+                else False
+            )
+            self.ifResident = (
+                data["ifResident"]
+                if ("ifResident" in data) and (data["ifResident"] in [True, False])
+                else False
+            )
+            self.MemoryBudgetMB = (
+                data["MemoryBudgetMB"]
+                if ("MemoryBudgetMB" in data) and isinstance(data["MemoryBudgetMB"], int)
+                else 120
+            )
+            self.BackupCount = (
+                data["BackupCount"]
+                if ("BackupCount" in data) and isinstance(data["BackupCount"], int)
+                else 10
+            )
+            self.BackupDays = (
+                data["BackupDays"]
+                if ("BackupDays" in data) and isinstance(data["BackupDays"], int)
+                else 7
+            )
+            self.ifCreateNote = (
+                data["ifCreateNote"]
+                if ("ifCreateNote" in data) and (data["ifCreateNote"] in [True, False])
+                else True
+            )
+            self.TemplatePath = data["TemplatePath"] if "TemplatePath" in data else ""
         else:
             self.theme = "light"
             self.ifTimeStamp = False
@@ -193,6 +1626,19 @@ class App(CTk):
             self.DailyFormat = ""
             self.BlockName = ""
             self.QuickAddText = ""
+            self.AttachmentDir = "attachments"
+            self.ImageMaxWidth = 1920
+            self.HttpEnabled = False
+            self.HttpPort = 27183
+            self.HttpToken = ""
+            self.BlockRoutes = {}
+            self.ifChronological = False
+            self.ifResident = False
+            self.MemoryBudgetMB = 120
+            self.BackupCount = 10
+            self.BackupDays = 7
+            self.ifCreateNote = True
+            self.TemplatePath = ""
 
         # ----------------------------------#
         #             窗口布局
@@ -266,6 +1712,44 @@ class App(CTk):
             command=self.on_click_ButtonQuickAdd,
         )
         self.ButtonQuickAdd.pack(fill="y", padx=(5, 20), pady=(6, 5), side="right")
+        self.ButtonUndo = CTkButton(
+            master=self.FrameQuickAddButton,
+            text="撤销",
+            compound="top",
+            anchor="center",
+            hover=True,
+            state="normal",
+            corner_radius=15,
+            border_width=0,
+            border_spacing=0,
+            width=60,
+            height=30,
+            fg_color=("#dcdcdc", "#A1A1A1"),
+            text_color=("#030303", "#030303"),
+            hover_color=("#bebebe", "#818181"),
+            font=CTkFont(family=self.fontFamily, size=15),
+            command=self.on_click_ButtonUndo,
+        )
+        self.ButtonUndo.pack(fill="y", padx=5, pady=(6, 5), side="right")
+        self.ButtonResident = CTkButton(
+            master=self.FrameQuickAddButton,
+            text="常驻",
+            compound="top",
+            anchor="center",
+            hover=True,
+            state="normal",
+            corner_radius=15,
+            border_width=0,
+            border_spacing=0,
+            width=60,
+            height=30,
+            fg_color=("#dcdcdc", "#A1A1A1"),
+            text_color=("#030303", "#030303"),
+            hover_color=("#bebebe", "#818181"),
+            font=CTkFont(family=self.fontFamily, size=15),
+            command=self.on_click_ButtonResident,
+        )
+        self.ButtonResident.pack(fill="y", padx=5, pady=(6, 5), side="right")
         self.FrameCollapse = CTkFrame(
             master=self,
             corner_radius=5,
@@ -294,13 +1778,70 @@ class App(CTk):
             command=lambda: self.on_click_ButtonCollapse(),
         )
         self.ButtonCollapse.pack(pady=(0, 0), fill="both", padx=10)
+        self.FrameSetting = None  # 设置区按需构建，见 build_setting_frame
+
+        # ----------------------------------#
+        #             控件样式
+        # ----------------------------------#
+        self.ToolTipButtonQuickAdd = ToolTip(
+            self.ButtonQuickAdd,
+            self.fontFamily,
+            "Ctrl + S",
+            self.scale,
+        )
+        self.ToolTipButtonUndo = ToolTip(
+            self.ButtonUndo,
+            self.fontFamily,
+            "撤销上一条记录 Ctrl + Alt + Z",
+            self.scale,
+        )
+        self.ToolTipButtonCollapse = ToolTip(
+            self.ButtonCollapse,
+            self.fontFamily,
+            "折叠/展开设置区",
+            self.scale,
+        )
+        self.ToolTipButtonResident = ToolTip(
+            self.ButtonResident,
+            self.fontFamily,
+            "常驻模式 Ctrl + M",
+            self.scale,
+        )
+        if self.BlockName != "":
+            self.parseDailyPath()
+        self.set_collapse_state()  # 初始化折叠状态
+        if self.ifTimeStamp:  # 初始化时间戳状态
+            self.set_time_stamp()
+        if self.theme == "dark":  # 初始化主题状态
+            self.set_theme()
+        if self.HttpEnabled:  # 启动本机 HTTP 收集接口
+            self.start_capture_server()
+
+        self.TextBoxQuickAdd.bind(
+            "<Control-s>",
+            lambda event: self.on_click_ButtonQuickAdd(),
+        )
+        self.TextBoxQuickAdd.bind("<<Paste>>", self.on_paste_TextBoxQuickAdd)
+        self.bind("<Control-Alt-z>", lambda event: self.on_click_ButtonUndo())
+        if windnd is not None:
+            windnd.hook_dropfiles(
+                self.TextBoxQuickAdd._textbox,
+                func=self.on_drop_TextBoxQuickAdd,
+                force_unicode=True,
+            )
+        self.bind("<Control-m>", lambda event: self.on_click_ButtonResident())
+        if self.ifResident:  # 初始化常驻模式（在主窗口设置好尺寸之后）
+            self.after_idle(self.set_resident_state)
+        self.after(60000, self.check_memory)
+        self.after(5000, lambda: self.after_idle(self.prepare_tomorrow))
+
+    def build_setting_frame(self):
         self.FrameSetting = CTkFrame(
             master=self,
             corner_radius=10,
             fg_color=("gray86", "#2b2b2b"),
             bg_color="transparent",
         )
-        self.FrameSetting.pack(pady=(0, 5), fill="both", padx=5)
         self.FrameVaultDir = CTkFrame(
             master=self.FrameSetting,
             bg_color="transparent",
@@ -368,10 +1909,7 @@ class App(CTk):
             master=self.FrameVaultDir,
             width=30,
             height=30,
-            image=CTkImage(
-                Image.open(resource_path(self.btnThemeIcons[self.theme])),
-                size=(16, 16),
-            ),
+            image=self.get_icon(self.btnThemeIcons[self.theme]),
             anchor="center",
             text="",
             corner_radius=8,
@@ -389,10 +1927,7 @@ class App(CTk):
             master=self.FrameVaultDir,
             width=30,
             height=30,
-            image=CTkImage(
-                Image.open(resource_path(self.btnTimeStampIcons[self.ifTimeStamp])),
-                size=(16, 16),
-            ),
+            image=self.get_icon(self.btnTimeStampIcons[self.ifTimeStamp]),
             anchor="center",
             text="",
             corner_radius=8,
@@ -532,16 +2067,25 @@ class App(CTk):
             command=self.on_click_ButtonBlockName,
         )
         self.ButtonBlockName.pack(side="left", fill="y", padx=5, pady=2)
-
-        # ----------------------------------#
-        #             控件样式
-        # ----------------------------------#
-        self.ToolTipButtonQuickAdd = ToolTip(
-            self.ButtonQuickAdd,
-            self.fontFamily,
-            "Ctrl + S",
-            self.scale,
+        self.ButtonCalendar = CTkButton(
+            master=self.FrameBlockName,
+            text="日历",
+            compound="top",
+            anchor="center",
+            hover=True,
+            state="normal",
+            corner_radius=15,
+            border_width=0,
+            border_spacing=0,
+            width=60,
+            height=30,
+            fg_color=("#24aca9", "#29c7c2"),
+            text_color=("gray98", "#46484a"),
+            hover_color=("#29c7c2", "#24aca9"),
+            font=CTkFont(family=self.fontFamily, size=15),
+            command=self.on_click_ButtonCalendar,
         )
+        self.ButtonCalendar.pack(side="right", fill="y", padx=(0, 10), pady=2)
         self.ToolTipButtonTimeStamp = ToolTip(
             self.ButtonTimeStamp,
             self.fontFamily,
@@ -554,10 +2098,10 @@ class App(CTk):
             self.btnThemeToolTips[self.theme],
             self.scale,
         )
-        self.ToolTipButtonCollapse = ToolTip(
-            self.ButtonCollapse,
+        self.ToolTipButtonCalendar = ToolTip(
+            self.ButtonCalendar,
             self.fontFamily,
-            "折叠/展开设置区",
+            "查看日记日历",
             self.scale,
         )
         if self.VaultDir != "":
@@ -567,17 +2111,6 @@ class App(CTk):
             self.EntryDailyFormat.insert(0, self.DailyFormat)
         if self.BlockName != "":
             self.EntryBlockName.insert(0, self.BlockName)
-            self.parseDailyPath()
-        self.set_collapse_state()  # 初始化折叠状态
-        if self.ifTimeStamp:  # 初始化时间戳状态
-            self.set_time_stamp()
-        if self.theme == "dark":  # 初始化主题状态
-            self.set_theme()
-
-        self.TextBoxQuickAdd.bind(
-            "<Control-s>",
-            lambda event: self.on_click_ButtonQuickAdd(),
-        )
         self.EntryDailyFormat.bind(
             "<Return>",
             lambda event: self.on_click_ButtonDailyFormat(),
@@ -587,6 +2120,23 @@ class App(CTk):
             lambda event: self.on_click_ButtonBlockName(),
         )
 
+    def release_setting_frame(self):
+        if self.FrameSetting is None:
+            return
+        self.ToolTipButtonTimeStamp.hide()
+        self.ToolTipButtonTheme.hide()
+        self.ToolTipButtonCalendar.hide()
+        self.FrameSetting.destroy()
+        self.FrameSetting = None
+        for name in self.settingWidgets:
+            setattr(self, name, None)
+
+    def get_icon(self, path):
+        # 图标按路径缓存，切换主题 / 时间戳时不再重复创建 CTkImage
+        if path not in self.icons:
+            self.icons[path] = CTkImage(Image.open(resource_path(path)), size=(16, 16))
+        return self.icons[path]
+
     def show_info_popup(
         self, message: str = "", type: str = "info", duration: int = 1500
     ):
@@ -665,6 +2215,19 @@ class App(CTk):
             "DailyFormat": self.DailyFormat,
             "BlockName": self.BlockName,
             "QuickAddText": self.QuickAddText,
+            "AttachmentDir": self.AttachmentDir,
+            "ImageMaxWidth": self.ImageMaxWidth,
+            "HttpEnabled": self.HttpEnabled,
+            "HttpPort": self.HttpPort,
+            "HttpToken": self.HttpToken,
+            "BlockRoutes": self.BlockRoutes,
+            "ifChronological": self.ifChronological,
+            "ifResident": self.ifResident,
+            "MemoryBudgetMB": self.MemoryBudgetMB,
+            "BackupCount": self.BackupCount,
+            "BackupDays": self.BackupDays,
+            "ifCreateNote": self.ifCreateNote,
+            "TemplatePath": self.TemplatePath,
         }
         with open(self.initDir, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
@@ -676,11 +2239,57 @@ class App(CTk):
         self.saveSetting()  # 保存折叠状态
 
     def set_collapse_state(self):
-        if self.ifCollapsed:
-            self.FrameSetting.pack_forget()
+        if self.ifCollapsed or self.ifResident:
+            if self.FrameSetting is not None:
+                self.FrameSetting.pack_forget()
         else:
+            if self.FrameSetting is None:
+                self.build_setting_frame()
             self.FrameSetting.pack(fill="x", pady=(5, 5), padx=5)
 
+    def on_click_ButtonResident(self):
+        self.ifResident = not self.ifResident
+        self.set_resident_state()
+        self.saveSetting()
+
+    def set_resident_state(self):
+        if self.ifResident:
+            # 只保留输入区：设置区、图标与日历缓存全部释放，需要时再重建
+            self.normalGeometry = self.geometry()
+            self.FrameCollapse.pack_forget()
+            self.release_setting_frame()
+            self.icons.clear()
+            self.release_caches()
+            self.minsize(320, 160)
+            self.geometry("360x180")
+            self.attributes("-topmost", True)
+            self.ButtonResident.configure(text="展开")
+        else:
+            self.attributes("-topmost", False)
+            self.minsize(640, 480)
+            if self.normalGeometry:
+                self.geometry(self.normalGeometry)
+            self.FrameCollapse.pack(pady=(0, 5), fill="x", padx=5)
+            self.set_collapse_state()
+            self.ButtonResident.configure(text="常驻")
+
+    def release_caches(self):
+        if self.calendarView is not None and self.calendarView.exists():
+            self.calendarView.window.destroy()
+        self.calendarView = None
+        self.vaultCalendar.clear()
+        gc.collect()
+
+    def check_memory(self):
+        rss = get_rss()
+        if rss is not None and self.MemoryBudgetMB > 0:
+            if rss > self.MemoryBudgetMB * 1024 * 1024:
+                # 只丢弃扫描缓存（在扫描线程中执行，避免与进行中的扫描冲突），
+                # 用户正在看的日历窗口保持不动
+                self.vaultCalendar.executor.submit(self.vaultCalendar.clear)
+                gc.collect()
+        self.after(60000, self.check_memory)
+
     def on_click_ButtonTheme(self):
         if self.theme == "light":
             self.theme = "dark"
@@ -694,12 +2303,9 @@ class App(CTk):
 
     def set_theme(self):
         set_appearance_mode(self.theme)
-        self.ButtonTheme.configure(
-            image=CTkImage(
-                Image.open(resource_path(self.btnThemeIcons[self.theme])),
-                size=(16, 16),
-            )
-        )
+        if self.FrameSetting is None:
+            return
+        self.ButtonTheme.configure(image=self.get_icon(self.btnThemeIcons[self.theme]))
         self.ToolTipButtonTheme.setText(self.btnThemeToolTips[self.theme])
 
     def on_click_ButtonTimeStamp(self):
@@ -708,11 +2314,10 @@ class App(CTk):
         self.saveSetting()
 
     def set_time_stamp(self):
+        if self.FrameSetting is None:
+            return
         self.ButtonTimeStamp.configure(
-            image=CTkImage(
-                Image.open(resource_path(self.btnTimeStampIcons[self.ifTimeStamp])),
-                size=(16, 16),
-            )
+            image=self.get_icon(self.btnTimeStampIcons[self.ifTimeStamp])
         )
         self.ToolTipButtonTimeStamp.setText(self.btnTimeStampToolTips[self.ifTimeStamp])
 
@@ -743,66 +2348,62 @@ class App(CTk):
         if self.DailyFormat != "":
             self.saveSetting()
 
-    def parseDailyPath(self):
-        self.DailyName = self.parseDailyFormat() + ".md"
+    def parseDailyPath(self, dt=None):
+        self.DailyName = self.daily_name(dt or datetime.now())
         self.DailyPath = os.path.join(self.VaultDir, self.DailyName)
-        if not os.path.exists(self.DailyPath):
+        if not self.ifCreateNote and not os.path.exists(self.DailyPath):
             self.show_info_popup("日记文件不存在", "error")
             self.LabelDailyName.configure(text="")
             return -1
         self.LabelDailyName.configure(text=self.DailyName)
 
     def parseDailyFormat(self, dt: datetime = None, lang: str = "zh") -> str:  # type: ignore
-        mapping = {
-            "{YYYY}": "%Y",
-            "{YY}": "%y",
-            "{MM}": "%m",
-            "{DDDD}": "%j",
-            # "{DDD}": "%j",
-            "{DD}": "%d",
-            "{dddd}": "%A",
-            "{ddd}": "%a",
-            "{dd}": "%d",
-            "{d}": "%w",
-            "{HH}": "%H",
-            "{hh}": "%I",
-            "{mm}": "%M",
-            "{ss}": "%S",
-        }
+        return render_daily_format(self.DailyFormat, dt, lang)
 
-        mapping_lang = {
-            "Monday": "星期一",
-            "Tuesday": "星期二",
-            "Wednesday": "星期三",
-            "Thursday": "星期四",
-            "Friday": "星期五",
-            "Saturday": "星期六",
-            "Sunday": "星期日",
-            "Mon": "周一",
-            "Tue": "周二",
-            "Wed": "周三",
-            "Thu": "周四",
-            "Fri": "周五",
-            "Sat": "周六",
-            "Sun": "周日",
-            "Mo": "一",
-            "Tu": "二",
-            "We": "三",
-            "Th": "四",
-            "Fr": "五",
-            "Sa": "六",
-            "Su": "日",
-        }
-        dt = dt or datetime.now()
-        fmt = self.DailyFormat
-        for mjs, pyfmt in mapping.items():
-            fmt = fmt.replace(mjs, pyfmt)
-            fmt = dt.strftime(fmt)
-            if lang == "zh":
-                for mjs, pyfmt in mapping_lang.items():
-                    fmt = fmt.replace(mjs, pyfmt)
+    def daily_name(self, dt):
+        # 日记名按日期缓存；格式中含时分秒时每次重新渲染
+        if any(token in self.DailyFormat for token in BulkImporter.timeTokens):
+            return self.parseDailyFormat(dt) + ".md"
+        key = (self.DailyFormat, dt.date())
+        with self.dailyNamesLock:
+            name = self.dailyNames.get(key)
+            if name is None:
+                if len(self.dailyNames) >= 8:
+                    self.dailyNames.clear()
+                name = self.parseDailyFormat(dt) + ".md"
+                self.dailyNames[key] = name
+            return name
 
-        return fmt
+    def prepare_tomorrow(self):
+        # 空闲时预渲染明天的日记路径并预建目录，跨天后的第一次记录无需等待
+        if self.VaultDir != "" and self.DailyFormat != "" and self.ifCreateNote:
+            filepath = os.path.join(
+                self.VaultDir, self.daily_name(datetime.now() + timedelta(days=1))
+            )
+            future = self.idleExecutor.submit(
+                self.writer.prepare_note, filepath, self.writer_options()
+            )
+            self.check_prepared(future)
+        # 每天清理一次过期备份，覆盖那些已不再写入的旧日记
+        if self.VaultDir != "" and time.time() - self.lastBackupSweep > 86400:
+            self.lastBackupSweep = time.time()
+            self.idleExecutor.submit(
+                self.writer.sweep_backups, self.VaultDir, self.BackupDays
+            )
+        self.after(600000, lambda: self.after_idle(self.prepare_tomorrow))
+
+    def check_prepared(self, future):
+        # 预建失败（如模板文件被移走）时提示一次，修好之前不再重复弹窗
+        if not future.done():
+            self.after(200, lambda: self.check_prepared(future))
+            return
+        error = future.exception()
+        if isinstance(error, WriteError):
+            if not self.templateWarned:
+                self.templateWarned = True
+                self.show_info_popup(str(error), "warning")
+        else:
+            self.templateWarned = False
 
     def on_click_ButtonBlockName(self):
         if self.EntryBlockName.get() == "":
@@ -829,45 +2430,165 @@ class App(CTk):
             self.show_info_popup("请先输入内容", "warning")
             return
 
-        self.insert_text_to_block(self.DailyPath)
+        # 在任何文件 I/O 之前拦截重复提交：日记名来自缓存，不访问磁盘
+        now = datetime.now()
+        keys = self.recentKeys.make_keys(
+            os.path.join(self.VaultDir, self.daily_name(now)),
+            self.BlockName,
+            self.QuickAddText,
+        )
+        if self.recentKeys.seen(keys):
+            self.show_info_popup("内容已记录", "info")
+            return
 
-    def insert_text_to_block(self, filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        f.close()
+        if self.parseDailyPath(now) == -1:  # 跨天后切换到当天的日记
+            return
+        if self.insert_text_to_block(self.DailyPath):
+            self.recentKeys.add(keys)
 
-        block_start = None
-        block_end = None
+    def on_paste_TextBoxQuickAdd(self, event=None):
+        try:
+            clip = ImageGrab.grabclipboard()
+        except Exception:
+            clip = None  # 剪贴板中没有图片或平台不支持，按普通文本粘贴
+        if isinstance(clip, Image.Image):
+            self.add_attachments([clip])
+            return "break"
+        if isinstance(clip, list) and clip:
+            self.add_attachments([path for path in clip if os.path.isfile(path)])
+            return "break"
 
-        # 查找块开始（标题行）的位置
-        for i, line in enumerate(lines):
-            if line.strip() == self.BlockName.strip():
-                block_start = i
-                break
+    def on_drop_TextBoxQuickAdd(self, files):
+        # windnd 在窗口消息中回调，这里只提交任务，不做任何 I/O
+        self.after(0, lambda: self.add_attachments([f for f in files if os.path.isfile(f)]))
 
-        if block_start is None:
-            self.show_info_popup("找不到指定块", "error")
+    def add_attachments(self, items):
+        if self.VaultDir == "":
+            self.show_info_popup("请先设置日记路径", "warning")
             return
+        attachDir = os.path.join(self.VaultDir, self.AttachmentDir)
+        batch = []  # 同批尚未完成的占位，按输入顺序排列
+        for item in items:
+            if isinstance(item, Image.Image):
+                future = self.attachmentSaver.submit_image(
+                    item, attachDir, self.ImageMaxWidth
+                )
+            else:
+                future = self.attachmentSaver.submit_file(
+                    item, attachDir, self.ImageMaxWidth
+                )
+            # 在当前光标处占位，保存完成后再插入嵌入链接
+            mark = f"attachment{id(future)}"
+            self.TextBoxQuickAdd._textbox.mark_set(mark, "insert")
+            self.TextBoxQuickAdd._textbox.mark_gravity(mark, "left")
+            batch.append(mark)
+            self.insert_attachment(future, mark, batch)
 
-        # 查找下一个标题（块的结束）
-        heading_pattern = re.compile(r"^#{1,6}\s+.+$")
-        block_end = len(lines)
-        for j in range(block_start + 1, len(lines)):
-            if heading_pattern.match(lines[j].strip()):
-                block_end = j
-                break
+    def insert_attachment(self, future, mark, batch):
+        if not future.done():
+            self.after(50, lambda: self.insert_attachment(future, mark, batch))
+            return
+        textbox = self.TextBoxQuickAdd._textbox
+        try:
+            name = future.result()
+        except Exception:
+            self.show_info_popup("附件保存失败", "error")
+        else:
+            link = f"![[{name}]]"
+            # 同批后续的占位与本占位重合时移到链接之后，链接因此按输入顺序排列，
+            # 而不是按保存完成的先后
+            later = [
+                m
+                for m in batch[batch.index(mark) + 1 :]
+                if textbox.compare(m, "==", mark)
+            ]
+            textbox.insert(mark, link)
+            end = textbox.index(f"{mark} + {len(link)} chars")
+            for m in later:
+                textbox.mark_set(m, end)
+        textbox.mark_unset(mark)
+        batch.remove(mark)
 
-        if self.ifTimeStamp:
-            self.QuickAddText = (
-                self.QuickAddText + " [" + datetime.now().strftime("%H:%M:%S") + "]"
+    def insert_text_to_block(self, filepath):
+        try:
+            self.writer.write(
+                filepath,
+                [{"text": self.QuickAddText, "time": datetime.now()}],
+                self.writer_options(),
+                "gui",
             )
-        # 插入到块末尾
-        lines.insert(block_end, "\n" + self.QuickAddText + "\n")
-
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.writelines(lines)
-        f.close()
+        except WriteError as e:
+            self.show_info_popup(str(e), "error")
+            return False
         self.show_info_popup("记录成功", "info")
+        return True
+
+    def on_click_ButtonCalendar(self):
+        if self.VaultDir == "" or self.DailyFormat == "":
+            self.show_info_popup("请先设置日记路径", "warning")
+            return
+        # 先用上次的结果立即打开，后台增量扫描完成后再刷新
+        if self.calendarView is not None and self.calendarView.exists():
+            self.calendarView.window.lift()
+        else:
+            self.calendarView = CalendarView(
+                self, self.fontFamily, self.vaultCalendar.counts
+            )
+        blockNames = {self.BlockName.strip()} | {
+            block.strip() for block in self.BlockRoutes.values()
+        }
+        future = self.vaultCalendar.submit(
+            self.VaultDir, self.DailyFormat, blockNames, self.ifTimeStamp
+        )
+        self.refresh_calendar(future)
+
+    def refresh_calendar(self, future):
+        if not future.done():
+            self.after(50, lambda: self.refresh_calendar(future))
+            return
+        if future.exception() is not None:
+            self.show_info_popup("日历扫描失败", "error")
+            return
+        if self.calendarView is not None:
+            self.calendarView.set_counts(future.result())
+
+    def on_click_ButtonUndo(self):
+        try:
+            self.writer.undo_last("gui")
+        except WriteError as e:
+            self.show_info_popup(str(e), "warning")
+            return
+        self.recentKeys.clear()  # 撤销后允许再次提交相同内容
+        self.show_info_popup("已撤销", "info")
+
+    def writer_options(self):
+        return {
+            "BlockName": self.BlockName,
+            "ifTimeStamp": self.ifTimeStamp,
+            "BlockRoutes": self.BlockRoutes,
+            "ifChronological": self.ifChronological,
+            "BackupCount": self.BackupCount,
+            "BackupDays": self.BackupDays,
+            "ifCreateNote": self.ifCreateNote,
+            "TemplatePath": (
+                os.path.join(self.VaultDir, self.TemplatePath)
+                if self.TemplatePath != ""
+                else ""
+            ),
+        }
+
+    def resolve_daily(self, dt=None):
+        # 供 HTTP 接口线程调用：只读取设置，不触碰任何控件
+        filepath = os.path.join(self.VaultDir, self.daily_name(dt or datetime.now()))
+        return filepath, self.writer_options()
+
+    def start_capture_server(self):
+        self.captureServer = CaptureServer(
+            self.writer, self.resolve_daily, self.HttpPort, self.HttpToken
+        )
+        if not self.captureServer.start():
+            self.captureServer = None
+            self.show_info_popup("HTTP 端口被占用", "error")
 
     def center_window(self, width, height):
         screen_width = self.winfo_screenwidth()
@@ -905,7 +2626,33 @@ class App(CTk):
             return 1.0  # 默认缩放比例为 1.0
 
 
+def main_import(argv):
+    parser = argparse.ArgumentParser(prog="QuickDaily --import")
+    parser.add_argument("source", help="CSV（time,text[,block]）或 JSONL 文件")
+    parser.add_argument("--workers", type=int, default=None, help="并行写入的线程数")
+    parser.add_argument("--init", default="./init.json", help="配置文件路径")
+    args = parser.parse_args(argv)
+
+    with open(args.init, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    # 打包后的程序没有控制台（console=False），进度同时写入源文件旁的日志
+    logPath = args.source + ".import.log"
+    with open(logPath, "w", encoding="utf-8") as log:
+
+        def report(message):
+            print(message, flush=True)
+            log.write(message + "\n")
+            log.flush()
+
+        importer = BulkImporter(settings, args.workers, report)
+        written, failed = importer.run(args.source)
+    return 1 if failed or importer.skipped else 0
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--import":
+        sys.exit(main_import(sys.argv[2:]))
+
     set_default_color_theme("green")
     root = App()
     root.iconbitmap(resource_path("assets/icon.ico"))
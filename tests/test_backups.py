@@ -0,0 +1,95 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from QuickDaily import DailyWriter, WriteError
+
+NOTE = "# Today\n\n## Daily Record\n\n## Other\n"
+OPTIONS = {
+    "BlockName": "## Daily Record",
+    "ifTimeStamp": False,
+    "BlockRoutes": {},
+    "BackupCount": 3,
+    "BackupDays": 7,
+}
+
+
+def snapshot_name(dt):
+    return dt.strftime("%Y%m%d-%H%M%S-%f") + ".md"
+
+
+def test_sweep_prunes_by_age_across_all_notes(tmp_path):
+    now = datetime.now()
+    oldNote = tmp_path / "2024" / ".quickdaily" / "2024-01-01.md"
+    mixedNote = tmp_path / "2025" / ".quickdaily" / "2025-06-01.md"
+    hidden = tmp_path / ".obsidian" / ".quickdaily" / "x.md"
+    for folder in (oldNote, mixedNote, hidden):
+        folder.mkdir(parents=True)
+    (oldNote / snapshot_name(now - timedelta(days=30))).write_text("old")
+    (mixedNote / snapshot_name(now - timedelta(days=10))).write_text("old")
+    (mixedNote / snapshot_name(now - timedelta(days=1))).write_text("recent")
+    (hidden / snapshot_name(now - timedelta(days=30))).write_text("old")
+
+    DailyWriter().sweep_backups(str(tmp_path), 7)
+
+    assert not (tmp_path / "2024" / ".quickdaily").exists()
+    assert os.listdir(mixedNote) == [snapshot_name(now - timedelta(days=1))]
+    assert len(os.listdir(hidden)) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="no symlink support")
+def test_symlinked_note_stays_a_symlink(tmp_path):
+    target = tmp_path / "real.md"
+    target.write_text(NOTE, encoding="utf-8")
+    link = tmp_path / "note.md"
+    try:
+        link.symlink_to(target)
+    except OSError:
+        pytest.skip("creating symlinks is not permitted")
+
+    DailyWriter().write(str(link), [{"text": "hello", "time": datetime.now()}], OPTIONS)
+
+    assert link.is_symlink()
+    assert "hello" in target.read_text(encoding="utf-8")
+    assert len(os.listdir(tmp_path / ".quickdaily" / "note.md")) == 1
+
+
+def test_failed_replace_falls_back_to_in_place_write(tmp_path, monkeypatch):
+    note = tmp_path / "note.md"
+    note.write_text(NOTE, encoding="utf-8")
+
+    def locked(src, dst):
+        raise PermissionError(13, "sharing violation")
+
+    monkeypatch.setattr(os, "replace", locked)
+    DailyWriter().write(
+        str(note), [{"text": "kept", "time": datetime.now()}], OPTIONS
+    )
+    monkeypatch.undo()
+
+    assert "\nkept\n" in note.read_text(encoding="utf-8")
+    # 备份仍是写入前的内容，没有随原地写入一起改掉
+    backups = list((tmp_path / ".quickdaily" / "note.md").iterdir())
+    assert [b.read_text(encoding="utf-8") for b in backups] == [NOTE]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_write_failure_is_a_write_error(tmp_path, monkeypatch):
+    note = tmp_path / "note.md"
+    note.write_text(NOTE, encoding="utf-8")
+    monkeypatch.setattr(DailyWriter, "replace_file", lambda *args: False)
+    realOpen = open
+
+    def full(file, mode="r", *args, **kwargs):
+        if str(file) == str(note) and "w" in mode:
+            raise OSError(28, "No space left on device")
+        return realOpen(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", full)
+    with pytest.raises(WriteError, match="写入日记失败"):
+        DailyWriter().write(
+            str(note), [{"text": "lost", "time": datetime.now()}], OPTIONS
+        )
+    monkeypatch.undo()
+    assert note.read_text(encoding="utf-8") == NOTE
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from QuickDaily import BulkImporter
+
+
+def test_bad_rows_are_skipped_and_reported(tmp_path):
+    for day in ("2023-11-14", "2023-11-15"):
+        (tmp_path / f"{day}.md").write_text("# x\n\n## Daily Record\n", encoding="utf-8")
+    epoch = datetime(2023, 11, 14, 22, 13, 20).timestamp() + 0.5
+    source = tmp_path / "entries.csv"
+    source.write_text(
+        "time,text\n"
+        f"{epoch},float epoch\n"
+        "not a date,broken\n"
+        "2023-11-15T08:00:00,iso time\n"
+        ",missing time\n",
+        encoding="utf-8",
+    )
+    messages = []
+    importer = BulkImporter(
+        {
+            "VaultDir": str(tmp_path),
+            "DailyFormat": "{YYYY}-{MM}-{DD}",
+            "BlockName": "## Daily Record",
+            "BackupCount": 0,
+        },
+        workers=2,
+        report=messages.append,
+    )
+    written, failed = importer.run(str(source))
+
+    assert (written, failed, importer.skipped) == (2, [], 2)
+    assert f"跳过 {source}:3" in "\n".join(messages)
+    assert f"跳过 {source}:5" in "\n".join(messages)
+    assert "float epoch" in (tmp_path / "2023-11-14.md").read_text(encoding="utf-8")
+    assert "iso time" in (tmp_path / "2023-11-15.md").read_text(encoding="utf-8")
@@ -0,0 +1,141 @@
+"""
+CaptureServer 压力测试：多个 keep-alive 客户端并发提交批量条目
+
+可直接运行：python tests/test_capture_server.py [客户端数] [每个客户端的请求数]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from QuickDaily import CaptureServer, DailyWriter
+
+OPTIONS = {"BlockName": "## Daily Record", "ifTimeStamp": True, "BlockRoutes": {}}
+
+
+async def post(reader, writer, port, body, host=None):
+    host = host or f"127.0.0.1:{port}"
+    writer.write(
+        f"POST /entries HTTP/1.1\r\nHost: {host}\r\n".encode("latin-1")
+        + b"Content-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        + body
+    )
+    await writer.drain()
+    status = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    payload = json.loads(await reader.readexactly(int(headers["content-length"])))
+    return status, headers, payload
+
+
+async def post_batches(port, client, requests):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for i in range(requests):
+            body = json.dumps(
+                {"entries": [f"c{client}-r{i}-a", {"text": f"c{client}-r{i}-b"}]}
+            ).encode("utf-8")
+            status, headers, payload = await post(reader, writer, port, body)
+            assert status.startswith(b"HTTP/1.1 200"), status
+            assert payload == {"written": 2}
+            assert headers["connection"] == "keep-alive"
+    finally:
+        writer.close()
+
+
+def run_load(notePath, clients, requests):
+    with open(notePath, "w", encoding="utf-8") as f:
+        f.write("# Today\n\n## Daily Record\n\n## Other\nx\n")
+    server = CaptureServer(DailyWriter(), lambda dt: (notePath, OPTIONS), port=0)
+    assert server.start()
+    try:
+
+        async def main():
+            await asyncio.gather(
+                *(post_batches(server.port, c, requests) for c in range(clients))
+            )
+
+        started = time.perf_counter()
+        asyncio.run(main())
+        elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+
+    with open(notePath, "r", encoding="utf-8") as f:
+        text = f.read()
+    block = text[text.index("## Daily Record") : text.index("## Other")]
+    for c in range(clients):
+        for i in range(requests):
+            assert f"c{c}-r{i}-a [" in block
+            assert f"c{c}-r{i}-b [" in block
+    assert block.count("\nc") == clients * requests * 2
+    return clients * requests / elapsed
+
+
+def test_concurrent_keep_alive_clients(tmp_path):
+    rate = run_load(str(tmp_path / "note.md"), clients=20, requests=25)
+    print(f"{rate:.0f} req/s")
+
+
+def test_foreign_host_is_rejected_and_times_are_local(tmp_path):
+    notePath = str(tmp_path / "note.md")
+    with open(notePath, "w", encoding="utf-8") as f:
+        f.write("# Today\n\n## Daily Record\n")
+    seen = []
+
+    def resolve(dt):
+        seen.append(dt)
+        return notePath, OPTIONS
+
+    server = CaptureServer(DailyWriter(), resolve, port=0)
+    assert server.start()
+    try:
+
+        async def main():
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            try:
+                body = json.dumps({"text": "rebound"}).encode("utf-8")
+                rebound = f"evil.example:{server.port}"
+                status, _, _ = await post(reader, writer, server.port, body, rebound)
+                assert status.startswith(b"HTTP/1.1 403"), status
+                body = json.dumps(
+                    {"text": "utc", "time": "2024-05-01T12:00:00Z"}
+                ).encode("utf-8")
+                host = f"localhost:{server.port}"
+                status, _, payload = await post(reader, writer, server.port, body, host)
+                assert status.startswith(b"HTTP/1.1 200"), status
+            finally:
+                writer.close()
+
+        asyncio.run(main())
+    finally:
+        server.stop()
+
+    utc = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    assert seen == [utc.astimezone().replace(tzinfo=None)]
+    with open(notePath, "r", encoding="utf-8") as f:
+        text = f.read()
+    assert "rebound" not in text
+    assert "\nutc [" + seen[0].strftime("%H:%M:%S") + "]\n" in text
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        rate = run_load(os.path.join(tmp, "note.md"), clients, requests)
+    print(f"{clients} clients x {requests} requests: {rate:.0f} req/s")
@@ -0,0 +1,197 @@
+import builtins
+import os
+import threading
+from datetime import datetime
+
+from QuickDaily import DailyWriter, WriteError
+
+NOTE = (
+    "# Today\n\n"
+    "## Daily Record\nold\n\n"
+    "## Tasks\n- a\n\n"
+    "## Ideas\n\n"
+    "## Other\nx\n"
+)
+OPTIONS = {
+    "BlockName": "## Daily Record",
+    "ifTimeStamp": False,
+    "BlockRoutes": {"#todo": "## Tasks", "#idea": "## Ideas"},
+}
+
+
+def block(text, heading):
+    start = text.index(heading) + len(heading)
+    end = text.find("\n## ", start)
+    return text[start : end + 1 if end != -1 else len(text)]
+
+
+def test_routed_batch_is_one_read_and_one_write(tmp_path, monkeypatch):
+    note = tmp_path / "note.md"
+    note.write_text(NOTE, encoding="utf-8")
+    opened = []
+    realOpen = builtins.open
+
+    def spy(file, mode="r", *args, **kwargs):
+        if str(file) == str(note):
+            opened.append(mode)
+        return realOpen(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", spy)
+    now = datetime.now()
+    DailyWriter().write(
+        str(note),
+        [
+            {"text": "plain", "time": now},
+            {"text": "buy milk #todo", "time": now},
+            {"text": "an #idea", "time": now},
+            {"text": "call back #todo", "time": now},
+        ],
+        OPTIONS,
+    )
+    monkeypatch.undo()
+
+    assert opened == ["rb", "wb"]
+    text = note.read_text(encoding="utf-8")
+    assert block(text, "## Daily Record") == "\nold\n\n\nplain\n"
+    assert block(text, "## Tasks") == "\n- a\n\n\nbuy milk #todo\n\ncall back #todo\n"
+    assert block(text, "## Ideas") == "\n\n\nan #idea\n"
+    assert block(text, "## Other") == "\nx\n"
+
+
+def test_new_note_is_written_once_without_backup(tmp_path, monkeypatch):
+    note = tmp_path / "2024" / "2024-05-01.md"
+    options = dict(OPTIONS, ifCreateNote=True, BackupCount=5)
+    opened = []
+    realOpen = builtins.open
+
+    def spy(file, mode="r", *args, **kwargs):
+        if str(file).startswith(str(note)):
+            opened.append(mode)
+        return realOpen(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", spy)
+    monkeypatch.setattr(os, "link", lambda *args: opened.append("link"))
+    writer = DailyWriter()
+    now = datetime(2024, 5, 1, 9)
+    writer.write(
+        str(note), [{"text": "first", "time": now}, {"text": "b #todo", "time": now}], options
+    )
+    monkeypatch.undo()
+
+    # 模板只有默认块：路由目标不存在时退回默认块
+    assert opened == ["xb"]
+    assert note.read_text(encoding="utf-8") == "## Daily Record\n\nfirst\n\nb #todo\n"
+    assert not (tmp_path / "2024" / ".quickdaily").exists()
+    writer.undo_last()
+    assert note.read_text(encoding="utf-8") == "## Daily Record\n"
+
+
+def test_undo_keeps_refused_record_and_filters_by_source(tmp_path):
+    note = tmp_path / "note.md"
+    note.write_bytes(NOTE.encode("utf-8"))
+    writer = DailyWriter()
+    now = datetime.now()
+    writer.write(str(note), [{"text": "first", "time": now}], OPTIONS, "gui")
+    writer.write(str(note), [{"text": "second", "time": now}], OPTIONS, "gui")
+    writer.write(str(note), [{"text": "from http", "time": now}], OPTIONS, "http")
+
+    # 手动删掉第二条记录，使其无法撤销
+    note.write_bytes(note.read_bytes().replace(b"\nsecond\n", b""))
+    try:
+        writer.undo_last("gui")
+        assert False, "undo of an edited record must be refused"
+    except WriteError as e:
+        assert str(e) == "记录已被修改，无法撤销"
+    assert b"first" in note.read_bytes()
+
+    # 再次撤销只丢弃被拒绝的记录，第三次才撤销更早的一条
+    try:
+        writer.undo_last("gui")
+        assert False, "the refused record must be discarded first"
+    except WriteError as e:
+        assert str(e) == "已跳过无法撤销的记录"
+    assert b"first" in note.read_bytes()
+
+    # GUI 撤销不会动到 HTTP 写入的条目
+    writer.undo_last("gui")
+    text = note.read_text(encoding="utf-8")
+    assert block(text, "## Daily Record") == "\nold\n\n\nfrom http\n"
+
+
+def test_chronological_batch_in_crlf_note_and_undo(tmp_path):
+    original = (
+        "# Today\r\n\r\n"
+        "## Daily Record\r\na [09:00:00]\r\n\r\nb [12:00:00]\r\n\r\n"
+        "## Other\r\nx\r\n"
+    ).encode("utf-8")
+    note = tmp_path / "note.md"
+    note.write_bytes(original)
+    options = dict(OPTIONS, ifTimeStamp=True, ifChronological=True)
+    day = datetime(2024, 5, 1)
+    entries = [
+        {"text": "late", "time": day.replace(hour=13)},
+        {"text": "noon", "time": day.replace(hour=11)},
+        {"text": "early", "time": day.replace(hour=8)},
+        {"text": "mid\nsecond line", "time": day.replace(hour=10, minute=30)},
+        {"text": "tie", "time": day.replace(hour=9)},
+    ]
+    writer = DailyWriter()
+    writer.write(str(note), entries, options, "gui")
+
+    # 早于第一条的插到块标题后；同一时间排在已有条目之后；多条落在同一行时按时间排列
+    assert note.read_bytes().decode("utf-8") == (
+        "# Today\r\n\r\n"
+        "## Daily Record\r\n"
+        "\r\nearly [08:00:00]\r\n"
+        "a [09:00:00]\r\n"
+        "\r\ntie [09:00:00]\r\n"
+        "\r\nmid\r\nsecond line [10:30:00]\r\n"
+        "\r\nnoon [11:00:00]\r\n"
+        "\r\nb [12:00:00]\r\n\r\n"
+        "\r\nlate [13:00:00]\r\n"
+        "## Other\r\nx\r\n"
+    )
+    assert writer.undo_last("gui") == 3
+    assert note.read_bytes() == original
+
+
+def test_undo_scan_is_safe_during_concurrent_writes(tmp_path):
+    note = tmp_path / "note.md"
+    note.write_bytes(NOTE.encode("utf-8"))
+    writer = DailyWriter(journalSize=20)
+    done = threading.Event()
+
+    def capture():
+        for i in range(500):
+            entry = {"text": f"http {i}", "time": datetime.now()}
+            writer.write(str(note), [entry], OPTIONS, "http")
+        done.set()
+
+    thread = threading.Thread(target=capture)
+    thread.start()
+    # 只有 HTTP 写入时，GUI 撤销应当一直是“没有可撤销的记录”，而不是迭代时出错
+    while not done.is_set():
+        try:
+            writer.undo_last("gui")
+            assert False, "there is no GUI write to undo"
+        except WriteError as e:
+            assert str(e) == "没有可撤销的记录"
+    thread.join()
+    assert len(writer.journal) == 20
+
+
+def test_missing_template_is_a_write_error(tmp_path):
+    note = tmp_path / "new.md"
+    options = dict(OPTIONS, ifCreateNote=True, TemplatePath=str(tmp_path / "gone.md"))
+    writer = DailyWriter()
+    try:
+        writer.write(str(note), [{"text": "x", "time": datetime.now()}], options)
+        assert False, "a missing template must surface as WriteError"
+    except WriteError as e:
+        assert str(e) == "模板文件不存在"
+    assert not note.exists()
+    try:
+        writer.prepare_note(str(tmp_path / "sub" / "next.md"), options)
+        assert False, "prepare_note must report the missing template too"
+    except WriteError as e:
+        assert str(e) == "模板文件不存在"
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+
+from QuickDaily import DailyWriter, RecentKeys, get_rss
+
+NOTE = "# Today\n\n## Daily Record\n\n## Other\n"
+OPTIONS = {"BlockName": "## Daily Record", "ifTimeStamp": True, "BlockRoutes": {}}
+
+
+def capture(writer, recentKeys, path, count, offset):
+    for i in range(count):
+        if (offset + i) % 500 == 0:  # 每 500 条换一篇新日记，模拟跨天
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(NOTE)
+        text = f"capture {offset + i} " + "x" * 200
+        keys = recentKeys.make_keys(path, OPTIONS["BlockName"], text)
+        if not recentKeys.seen(keys):
+            writer.write(path, [{"text": text, "time": datetime.now()}], OPTIONS, "gui")
+            recentKeys.add(keys)
+
+
+def test_rss_stays_bounded_after_many_captures(tmp_path):
+    if get_rss() is None:
+        pytest.skip("RSS is not available on this platform")
+    path = str(tmp_path / "note.md")
+    writer = DailyWriter()
+    recentKeys = RecentKeys()
+
+    capture(writer, recentKeys, path, 500, 0)  # 预热
+    baseline = get_rss()
+    capture(writer, recentKeys, path, 5000, 500)
+    grown = get_rss() - baseline
+
+    assert len(writer.journal) == writer.journal.maxlen
+    assert len(recentKeys.keys) == recentKeys.maxsize
+    assert grown < 8 * 1024 * 1024, f"RSS grew by {grown / 1024:.0f} KiB"
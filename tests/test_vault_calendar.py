@@ -0,0 +1,29 @@
+from datetime import date
+
+from QuickDaily import DailyWriter, VaultCalendar
+
+NOTE = (
+    "# 2024-03-05\n\n"
+    "## Daily Record\n"
+    "模板里的说明文字\n\n"
+    "first line\n\nsecond paragraph of the same capture [09:00:00]\n\n"
+    "another capture [10:30:00]\n"
+    "## Other\nx\n"
+)
+
+
+def test_counts_timestamped_captures(tmp_path):
+    folder = tmp_path / "2024" / "03"
+    folder.mkdir(parents=True)
+    (folder / "2024-03-05.md").write_text(NOTE, encoding="utf-8")
+    (folder / "notes.md").write_text(NOTE, encoding="utf-8")
+    calendar = VaultCalendar(DailyWriter())
+    fmt = "{YYYY}/{MM}/{YYYY}-{MM}-{DD}"
+
+    assert calendar.scan(str(tmp_path), fmt, {"## Daily Record"}, True) == {
+        date(2024, 3, 5): 2
+    }
+    # 未开启时间戳时按段落计数
+    assert calendar.scan(str(tmp_path), fmt, {"## Daily Record"}, False) == {
+        date(2024, 3, 5): 4
+    }